@@ -5,15 +5,92 @@ import plotly.graph_objects as go
 import plotly.express as px
 from src.data_loader import get_market_data, fetch_portfolio_data, calculate_returns
 from src.portfolio import Portfolio
-from src.risk_metrics import RiskCalculator
+from src.risk_metrics import RiskCalculator, var_from_sorted
 from src.backtesting import VaRBacktester
 from datetime import datetime, timedelta
 
+# Confidence levels shown in the Monte Carlo VaR chart
+CI_CONFIDENCE_LEVELS = [0.90, 0.95, 0.99]
+
+# Fixed seed so the cached Monte Carlo draw is reproducible, and so the metric
+# cards and the confidence-level chart read the same simulated returns
+MC_SEED = 42
+
 # Page config
 st.set_page_config(page_title="Portfolio Risk Management", 
                    page_icon="📊", 
                    layout="wide")
 
+class PartialPricesError(Exception):
+    """Raised inside the cached loader so incomplete downloads aren't cached"""
+    def __init__(self, prices, missing):
+        super().__init__(f"No data for: {', '.join(missing)}")
+        self.prices = prices
+        self.missing = missing
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _load_complete_prices(tickers, start_date, end_date):
+    """Fetch prices, caching only downloads that cover every ticker"""
+    prices = fetch_portfolio_data(tickers, start_date, end_date)
+    missing = [
+        t for t in tickers
+        if t not in prices.columns or prices[t].isna().all()
+    ]
+    if missing:
+        raise PartialPricesError(prices, missing)
+    return prices
+
+def load_prices(tickers, start_date, end_date):
+    """Fetch prices once per (tickers, start, end) so repeat clicks skip the network"""
+    try:
+        return _load_complete_prices(tickers, start_date, end_date)
+    except PartialPricesError as e:
+        # Use what was downloaded now; the next click retries the missing tickers
+        st.sidebar.warning(str(e))
+        return e.prices
+
+@st.cache_data(show_spinner=False)
+def compute_returns(prices):
+    """Log returns, cached on the price frame"""
+    return calculate_returns(prices)
+
+@st.cache_data(show_spinner=False)
+def portfolio_statistics(_portfolio, port_returns):
+    """Statistics of the session portfolio, keyed on its return series"""
+    return _portfolio.get_statistics()
+
+@st.cache_data(show_spinner=False)
+def correlation_matrix(_portfolio, returns):
+    """Asset correlation matrix of the session portfolio, keyed on asset returns"""
+    return _portfolio.get_correlation_matrix()
+
+@st.cache_data(show_spinner=False)
+def compute_metrics(port_returns, confidence_level, portfolio_value, n_simulations, seed):
+    """VaR and CVaR metrics for all three methods"""
+    # Seeded like simulate_returns, so Monte Carlo VaR is the same order
+    # statistic of the same draw shown in the confidence-level chart
+    calc = RiskCalculator(port_returns, confidence_level, seed=seed)
+    return calc.get_all_metrics(portfolio_value, n_simulations)
+
+@st.cache_data(show_spinner=False)
+def simulate_returns(port_returns, n_simulations, seed):
+    """Sorted Monte Carlo draw, reused for every confidence level"""
+    calc = RiskCalculator(port_returns, seed=seed)
+    return calc.monte_carlo_sorted(n_simulations)
+
+@st.cache_data(show_spinner=False)
+def run_kupiec_test(port_returns, var, confidence_level):
+    """Kupiec POF test for a constant VaR estimate"""
+    backtester = VaRBacktester(port_returns, var, confidence_level)
+    return backtester.kupiec_test()
+
+@st.cache_data(show_spinner=False)
+def run_rolling_backtest(port_returns, window, confidence_level, method='historical'):
+    """Rolling VaR estimates and the returns they are tested against"""
+    # Rolling estimates don't use the backtester's own VaR, so pass a placeholder
+    backtester = VaRBacktester(port_returns, 0.0, confidence_level)
+    return backtester.rolling_var_backtest(window=window, method=method)
+
 st.title("📊 Portfolio Risk Management System")
 st.markdown("**Value-at-Risk (VaR) and Conditional VaR (CVaR) Analysis**")
 
@@ -61,10 +138,11 @@ if st.sidebar.button("Calculate Risk Metrics"):
     with st.spinner("Loading market data..."):
         try:
             # Fetch data
-            end_date = datetime.now()
+            # Whole dates keep the cache key stable across clicks within a day
+            end_date = datetime.now().date()
             start_date = end_date - timedelta(days=years*365)
-            prices = fetch_portfolio_data(tickers, start_date, end_date)
-            returns = calculate_returns(prices)
+            prices = load_prices(tickers, start_date, end_date)
+            returns = compute_returns(prices)
             
             # Create portfolio
             portfolio = Portfolio(returns)
@@ -96,7 +174,7 @@ if 'portfolio' in st.session_state:
     
     col1, col2, col3, col4 = st.columns(4)
     
-    stats = portfolio.get_statistics()
+    stats = portfolio_statistics(portfolio, port_returns)
     
     with col1:
         st.metric("Expected Return (Annual)", 
@@ -132,10 +210,12 @@ if 'portfolio' in st.session_state:
     # VaR Metrics
     st.header("Value-at-Risk (VaR) Analysis")
     
-    calc = RiskCalculator(port_returns, st.session_state['confidence_level'])
-    metrics, dollar_metrics = calc.get_all_metrics(
+    metrics, dollar_metrics = compute_metrics(
+        port_returns,
+        st.session_state['confidence_level'],
         st.session_state['portfolio_value'],
-        st.session_state['n_simulations']
+        st.session_state['n_simulations'],
+        MC_SEED
     )
     
     # Display metrics
@@ -200,17 +280,19 @@ if 'portfolio' in st.session_state:
     # VaR Confidence Intervals (Monte Carlo)
     st.subheader("VaR Confidence Intervals (Monte Carlo)")
     
-    confidence_levels = [0.90, 0.95, 0.99]
-    mc_vars = []
-    
-    for cl in confidence_levels:
-        calc_temp = RiskCalculator(port_returns, cl)
-        var_val = calc_temp.monte_carlo_var(n_simulations=st.session_state['n_simulations'])
-        mc_vars.append(var_val * st.session_state['portfolio_value'])
+    sim_sorted = simulate_returns(
+        port_returns,
+        st.session_state['n_simulations'],
+        MC_SEED
+    )
+    mc_vars = [
+        var_val * st.session_state['portfolio_value']
+        for var_val in var_from_sorted(sim_sorted, CI_CONFIDENCE_LEVELS)
+    ]
     
     fig_ci = go.Figure()
     fig_ci.add_trace(go.Scatter(
-        x=[f"{cl*100:.0f}%" for cl in confidence_levels],
+        x=[f"{cl*100:.0f}%" for cl in CI_CONFIDENCE_LEVELS],
         y=mc_vars,
         mode='lines+markers',
         name='VaR',
@@ -258,14 +340,12 @@ if 'portfolio' in st.session_state:
     # Backtesting
     st.header("VaR Model Backtesting")
     
-    backtester = VaRBacktester(
+    kupiec = run_kupiec_test(
         port_returns,
-        pd.Series(metrics['Historical VaR'], index=port_returns.index),
+        metrics['Historical VaR'],
         st.session_state['confidence_level']
     )
     
-    kupiec = backtester.kupiec_test()
-    
     col1, col2, col3 = st.columns(3)
     
     with col1:
@@ -292,8 +372,10 @@ if 'portfolio' in st.session_state:
     
     window = st.slider("Rolling Window (Days)", 60, 500, 252)
     
-    var_estimates, actual_returns = backtester.rolling_var_backtest(
-        window=window,
+    var_estimates, actual_returns = run_rolling_backtest(
+        port_returns,
+        window,
+        st.session_state['confidence_level'],
         method='historical'
     )
     
@@ -385,7 +467,7 @@ if 'portfolio' in st.session_state:
     # Correlation Matrix
     st.header("Portfolio Diversification")
     
-    corr_matrix = portfolio.get_correlation_matrix()
+    corr_matrix = correlation_matrix(portfolio, returns)
     
     fig5 = go.Figure(data=go.Heatmap(
         z=corr_matrix.values,
@@ -1,7 +1,49 @@
+import bisect
+import math
+from collections import deque
+
 import numpy as np
 import pandas as pd
 from scipy import stats
 
+from src.risk_metrics import tail_index
+
+# Upper bound on the simulated-returns block held in memory per chunk of windows
+MC_CHUNK_BYTES = 64 * 2**20
+
+class FixedWindowQuantile:
+    def __init__(self, window, q):
+        """
+        Streaming quantile over a fixed-size sliding window
+        
+        Bisection locates each insert and removal in O(log W), but shifting the
+        sorted list makes every push O(W). Values must not be NaN, since NaN
+        breaks the sorted-list ordering.
+        
+        Parameters:
+        window: Number of most recent observations kept
+        q: Quantile to report (e.g. 0.05)
+        """
+        self.window = window
+        self.q = q
+        self._values = deque()
+        self._sorted = []
+    
+    def push(self, x):
+        """Add an observation, dropping the oldest once the window is full"""
+        if math.isnan(x):
+            raise ValueError("FixedWindowQuantile cannot hold NaN values")
+        if len(self._values) == self.window:
+            oldest = self._values.popleft()
+            del self._sorted[bisect.bisect_left(self._sorted, oldest)]
+        self._values.append(x)
+        bisect.insort(self._sorted, x)
+    
+    def value(self):
+        """Current quantile as an order statistic (matches RiskCalculator)"""
+        n = len(self._sorted)
+        return self._sorted[tail_index(self.q, n)]
+
 class VaRBacktester:
     def __init__(self, returns, var_estimates, confidence_level=0.95):
         """
@@ -9,20 +51,28 @@ class VaRBacktester:
         
         Parameters:
         returns: Actual returns
-        var_estimates: VaR estimates (as positive losses)
+        var_estimates: VaR estimates (as positive losses), or a single
+                       constant VaR applied to every observation
         confidence_level: Confidence level used for VaR
         """
         self.returns = returns
         self.var_estimates = var_estimates
         self.confidence_level = confidence_level
         self.alpha = 1 - confidence_level
+        
+        # Compare plain arrays rather than aligning pandas Series
+        self._losses = -np.asarray(returns, dtype=np.float64)
+        if np.ndim(var_estimates) == 0:
+            self._var = float(var_estimates)  # Broadcasts in comparisons
+        else:
+            self._var = np.asarray(var_estimates, dtype=np.float64)
+        self._log_rates = None  # (log(alpha), log(1 - alpha)), filled by kupiec_test
+        self._z = stats.norm.ppf(self.alpha)
     
     def get_violations(self):
-        """Identify VaR violations (exceedances)"""
+        """Identify VaR violations (exceedances) as a boolean array"""
         # VaR violation occurs when loss exceeds VaR
-        losses = -self.returns
-        violations = losses > self.var_estimates
-        return violations
+        return self._losses > self._var
     
     def kupiec_test(self):
         """
@@ -30,7 +80,7 @@ class VaRBacktester:
         Tests if violation rate matches expected rate
         """
         violations = self.get_violations()
-        n_violations = violations.sum()
+        n_violations = int(np.count_nonzero(violations))
         n_obs = len(violations)
         
         violation_rate = n_violations / n_obs
@@ -40,12 +90,20 @@ class VaRBacktester:
         if n_violations == 0 or n_violations == n_obs:
             lr_stat = 0
             p_value = 1.0
+        elif not 0 < expected_rate < 1:
+            # Any violation pattern is impossible under a 0% or 100% rate
+            lr_stat = math.inf
+            p_value = 0.0
         else:
+            if self._log_rates is None:
+                self._log_rates = (math.log(expected_rate), math.log(1 - expected_rate))
+            log_alpha, log_1m_alpha = self._log_rates
+            
             lr_stat = -2 * (
-                n_violations * np.log(expected_rate) +
-                (n_obs - n_violations) * np.log(1 - expected_rate) -
-                n_violations * np.log(violation_rate) -
-                (n_obs - n_violations) * np.log(1 - violation_rate)
+                n_violations * log_alpha +
+                (n_obs - n_violations) * log_1m_alpha -
+                n_violations * math.log(violation_rate) -
+                (n_obs - n_violations) * math.log(1 - violation_rate)
             )
             # Chi-squared distribution with 1 df
             p_value = 1 - stats.chi2.cdf(lr_stat, df=1)
@@ -63,45 +121,93 @@ class VaRBacktester:
     def calculate_avg_exceedance(self):
         """Calculate average size of VaR exceedances"""
         violations = self.get_violations()
-        losses = -self.returns
         
-        if violations.sum() == 0:
+        if not violations.any():
             return 0
         
-        exceedances = losses[violations] - self.var_estimates[violations]
+        exceedances = (self._losses - self._var)[violations]
         return exceedances.mean()
     
-    def rolling_var_backtest(self, window=252, method='historical'):
+    @staticmethod
+    def _rolling_moments(arr, window):
+        """
+        Rolling mean and sample standard deviation from running sums
+        
+        Each window shifts by one observation, so window sums are differences
+        of cumulative sums rather than being recomputed from scratch.
+        """
+        cs = np.concatenate(([0.0], np.cumsum(arr)))
+        cs2 = np.concatenate(([0.0], np.cumsum(arr * arr)))
+        
+        # Drop the final window, which has no following day to evaluate
+        sums = (cs[window:] - cs[:-window])[:-1]
+        sumsq = (cs2[window:] - cs2[:-window])[:-1]
+        
+        mu = sums / window
+        var = np.maximum(sumsq / window - mu * mu, 0.0)
+        sigma = np.sqrt(var * window / (window - 1))
+        return mu, sigma
+    
+    def rolling_var_backtest(self, window=252, method='historical', n_simulations=10000,
+                             seed=None):
         """
         Rolling window VaR backtest
         
         Parameters:
         window: Rolling window size
         method: 'historical', 'parametric', or 'monte_carlo'
+        n_simulations: Simulations per window for 'monte_carlo'
+        seed: Optional seed for reproducible 'monte_carlo' backtests
         """
-        from src.risk_metrics import RiskCalculator
+        if method not in ('historical', 'parametric', 'monte_carlo'):
+            raise ValueError(f"Unknown VaR method: {method}")
+        if method != 'historical' and window < 2:
+            raise ValueError(f"{method} VaR needs a window of at least 2 returns")
         
-        var_estimates = []
-        actual_returns = []
+        # Work on plain ndarrays and wrap in pandas once at the end
+        arr = np.asarray(self.returns, dtype=np.float64)
+        if np.isnan(arr).any():
+            raise ValueError("Rolling VaR backtest requires returns without NaN values")
+        idx = self.returns.index[window:]
+        n = max(len(arr) - window, 0)
+        var_estimates = np.empty(n)
         
-        for i in range(window, len(self.returns)):
-            # Use window of historical returns
-            window_returns = self.returns[i-window:i]
-            
-            # Calculate VaR
-            calc = RiskCalculator(window_returns, self.confidence_level)
-            
-            if method == 'historical':
-                var = calc.historical_var()
-            elif method == 'parametric':
-                var = calc.parametric_var()
-            elif method == 'monte_carlo':
-                var = calc.monte_carlo_var()
+        if n == 0:
+            pass
+        elif method == 'historical':
+            # Slide a sorted window forward one observation at a time
+            values = arr.tolist()
+            quantile = FixedWindowQuantile(window, self.alpha)
+            for x in values[:window]:
+                quantile.push(x)
+            for i in range(n):
+                var_estimates[i] = -quantile.value()
+                quantile.push(values[window + i])
+        else:
+            mu, sigma = self._rolling_moments(arr, window)
             
-            var_estimates.append(var)
-            actual_returns.append(self.returns.iloc[i])
+            if method == 'parametric':
+                np.multiply(sigma, self._z, out=var_estimates)
+                var_estimates += mu
+            else:
+                # Simulate windows in float32 row blocks so memory stays bounded,
+                # taking the same order statistic as RiskCalculator
+                rng = np.random.default_rng(seed)
+                k = tail_index(self.alpha, n_simulations)
+                rows = max(1, MC_CHUNK_BYTES // (4 * n_simulations))
+                for start in range(0, n, rows):
+                    stop = min(start + rows, n)
+                    simulated_returns = rng.standard_normal(
+                        (stop - start, n_simulations), dtype=np.float32
+                    )
+                    simulated_returns *= sigma[start:stop, None].astype(np.float32)
+                    simulated_returns += mu[start:stop, None].astype(np.float32)
+                    simulated_returns.partition(k, axis=1)
+                    var_estimates[start:stop] = simulated_returns[:, k]
+                    del simulated_returns  # Free the block before drawing the next
+            np.negative(var_estimates, out=var_estimates)
         
-        var_estimates = pd.Series(var_estimates, index=self.returns.index[window:])
-        actual_returns = pd.Series(actual_returns, index=self.returns.index[window:])
+        var_estimates = pd.Series(var_estimates, index=idx)
+        actual_returns = pd.Series(arr[window:], index=idx, name=self.returns.name)
         
         return var_estimates, actual_returns
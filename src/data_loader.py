@@ -2,8 +2,22 @@ import yfinance as yf
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
 
+def _fetch_one(ticker, start_date, end_date, max_retries=3):
+    """Fetch close prices for one ticker, backing off exponentially on errors"""
+    for attempt in range(max_retries):
+        try:
+            hist = yf.Ticker(ticker).history(start=start_date, end=end_date)
+            return hist['Close'] if not hist.empty else None
+        except Exception as e:
+            if attempt == max_retries - 1:
+                raise
+            delay = 0.5 * 2 ** attempt
+            print(f"Error downloading {ticker}: {e} (retrying in {delay:.1f}s)")
+            time.sleep(delay)
+
 def fetch_portfolio_data(tickers, start_date, end_date):
     """Fetch historical price data for portfolio tickers with retry logic"""
     
@@ -40,37 +54,50 @@ def fetch_portfolio_data(tickers, start_date, end_date):
         print(f"Error downloading data: {e}")
         print("Trying individual downloads...")
         
-        # Fallback: download each ticker individually
+        # Fallback: download each ticker individually, in parallel since
+        # the work is network-bound
         all_data = {}
-        for ticker in tickers:
-            try:
-                print(f"Downloading {ticker}...")
-                time.sleep(0.5)  # Small delay to avoid rate limiting
-                
-                stock = yf.Ticker(ticker)
-                hist = stock.history(start=start_date, end=end_date)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            futures = {
+                executor.submit(_fetch_one, ticker, start_date, end_date): ticker
+                for ticker in tickers
+            }
+            for future in as_completed(futures):
+                ticker = futures[future]
+                try:
+                    close = future.result()
+                except Exception as e:
+                    print(f"Error downloading {ticker}: {e}")
+                    continue
                 
-                if not hist.empty:
-                    all_data[ticker] = hist['Close']
+                if close is not None:
+                    all_data[ticker] = close
                 else:
                     print(f"Warning: No data for {ticker}")
-                    
-            except Exception as e:
-                print(f"Error downloading {ticker}: {e}")
-                continue
         
         if not all_data:
             raise ValueError("Failed to download any data")
         
-        # Combine into DataFrame
-        data = pd.DataFrame(all_data)
+        # Combine into DataFrame, keeping the requested ticker order
+        data = pd.DataFrame({t: all_data[t] for t in tickers if t in all_data})
         data = data.ffill().bfill()
         
         return data
 
 def calculate_returns(prices):
     """Calculate log returns from prices"""
-    returns = np.log(prices / prices.shift(1))
+    # Difference of log prices: one log per element and no shifted copy
+    log_prices = np.log(prices.to_numpy(dtype=np.float64))
+    log_returns = np.empty_like(log_prices)
+    if len(log_returns):
+        log_returns[0] = np.nan
+        log_returns[1:] = log_prices[1:] - log_prices[:-1]
+    
+    # Rebuild the same container type (Series or DataFrame) with its labels
+    if prices.ndim == 1:
+        returns = pd.Series(log_returns, index=prices.index, name=prices.name)
+    else:
+        returns = pd.DataFrame(log_returns, index=prices.index, columns=prices.columns)
     return returns.dropna()
 
 def get_market_data(tickers=['AAPL', 'MSFT', 'GOOGL', 'JPM', 'BAC', 
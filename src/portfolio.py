@@ -1,3 +1,5 @@
+from functools import cached_property
+
 import numpy as np
 import pandas as pd
 
@@ -20,20 +22,37 @@ class Portfolio:
         else:
             self.weights = np.array(weights)
             assert np.isclose(self.weights.sum(), 1.0), "Weights must sum to 1"
+        
+        # Row-major (T, N) so R @ weights streams through rows; the (N, T)
+        # transpose keeps each asset's history contiguous for per-asset work
+        self._R = np.ascontiguousarray(returns.to_numpy(dtype=np.float64))
+        self._R_T = np.ascontiguousarray(self._R.T)
+    
+    @cached_property
+    def port_returns(self):
+        """
+        Portfolio returns time series, computed on first access
+        
+        The Series is shared by every caller and backed by a read-only array,
+        so in-place edits raise instead of corrupting later statistics.
+        """
+        port_returns = self._R @ self.weights
+        port_returns.flags.writeable = False
+        return pd.Series(port_returns, index=self.returns.index, copy=False)
     
     def portfolio_returns(self):
-        """Calculate portfolio returns time series"""
-        return (self.returns * self.weights).sum(axis=1)
+        """Calculate portfolio returns time series (cached, read-only)"""
+        return self.port_returns
     
     def portfolio_value(self, initial_value=1000000):
         """Calculate portfolio value over time"""
-        portfolio_rets = self.portfolio_returns()
-        portfolio_value = initial_value * (1 + portfolio_rets).cumprod()
-        return portfolio_value
+        portfolio_rets = self.port_returns.to_numpy()
+        portfolio_value = initial_value * np.cumprod(1.0 + portfolio_rets)
+        return pd.Series(portfolio_value, index=self.returns.index)
     
     def get_statistics(self):
         """Calculate portfolio statistics"""
-        port_returns = self.portfolio_returns()
+        port_returns = self.port_returns
         
         stats = {
             'Expected Return (Annual)': port_returns.mean() * 252,
@@ -49,4 +68,6 @@ class Portfolio:
     
     def get_correlation_matrix(self):
         """Get correlation matrix of assets"""
-        return self.returns.corr()
+        # Returns are NaN-free after calculate_returns, so no pairwise masking
+        corr = np.corrcoef(self._R_T)
+        return pd.DataFrame(corr, index=self.assets, columns=self.assets)
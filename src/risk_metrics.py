@@ -1,85 +1,147 @@
+import math
+
 import numpy as np
 import pandas as pd
 from scipy import stats
 
+def tail_index(alpha, n):
+    """
+    Index of the VaR order statistic among n ascending returns
+    
+    alpha * n is rounded before flooring so float error in 1 - confidence_level
+    (e.g. 1 - 0.90 = 0.0999...98) doesn't drop the index by one.
+    """
+    return min(math.floor(round(alpha * n, 9)), n - 1)
+
+def _simulate_normal(rng, mu, sigma, n_simulations):
+    """Draw float32 normal returns; single precision is ample for tail quantiles"""
+    simulated_returns = rng.standard_normal(n_simulations, dtype=np.float32)
+    simulated_returns *= np.float32(sigma)
+    simulated_returns += np.float32(mu)
+    return simulated_returns
+
+def var_from_sorted(sorted_returns, confidence_levels):
+    """
+    VaR (as positive losses) at several confidence levels from one sorted draw
+    
+    Parameters:
+    sorted_returns: Ascending array of simulated returns
+    confidence_levels: Iterable of confidence levels (e.g. [0.90, 0.95, 0.99])
+    """
+    n = len(sorted_returns)
+    return [
+        -float(sorted_returns[tail_index(1 - cl, n)])
+        for cl in confidence_levels
+    ]
+
+def _mc_var_cvar(rng, mu, sigma, n_simulations, alpha):
+    """
+    Simulate normal returns once and return (VaR, CVaR) as positive losses
+    
+    The draw is partitioned in place around the VaR order statistic, so the
+    tail used for CVaR is the lowest k+1 elements and no full sort is needed.
+    """
+    simulated_returns = _simulate_normal(rng, mu, sigma, n_simulations)
+    
+    k = tail_index(alpha, n_simulations)
+    simulated_returns.partition(k)
+    
+    var = float(simulated_returns[k])
+    cvar = float(simulated_returns[:k + 1].mean(dtype=np.float64))
+    return -var, -cvar
+
 class RiskCalculator:
-    def __init__(self, returns, confidence_level=0.95):
+    def __init__(self, returns, confidence_level=0.95, seed=None):
         """
         Initialize risk calculator
         
         Parameters:
         returns: Series or array of returns
         confidence_level: Confidence level for VaR (default 95%)
+        seed: Optional seed for reproducible Monte Carlo simulations
         """
         self.returns = returns
         self.confidence_level = confidence_level
         self.alpha = 1 - confidence_level
+        self._rng = np.random.default_rng(seed)
+        
+        # Sorted once so any historical quantile is an index lookup
+        self._arr = np.ascontiguousarray(self.returns, dtype=np.float64)
+        self._sorted = np.sort(self._arr)
+        self._mu = self._arr.mean()
+        self._sigma = self._arr.std(ddof=1)
+        
+        # Z-score for confidence level and its density, fixed per instance
+        self._z = stats.norm.ppf(self.alpha)
+        self._phi_z = stats.norm.pdf(self._z)
+    
+    def _tail_index(self, alpha):
+        """Index of the VaR order statistic in the sorted returns"""
+        return tail_index(alpha, len(self._sorted))
     
-    def historical_var(self):
-        """Calculate Historical VaR"""
-        var = np.percentile(self.returns, self.alpha * 100)
+    def historical_var(self, alpha=None):
+        """Calculate Historical VaR (alpha defaults to 1 - confidence_level)"""
+        alpha = self.alpha if alpha is None else alpha
+        var = self._sorted[self._tail_index(alpha)]
         return -var  # Return as positive loss
     
-    def historical_cvar(self):
+    def historical_cvar(self, alpha=None):
         """Calculate Historical CVaR (Expected Shortfall)"""
-        var = -self.historical_var()  # Get as negative return
-        # Average of returns below VaR threshold
-        cvar = self.returns[self.returns <= var].mean()
+        alpha = self.alpha if alpha is None else alpha
+        # Average of returns at or below VaR threshold
+        cvar = self._sorted[:self._tail_index(alpha) + 1].mean()
         return -cvar  # Return as positive loss
 
     def parametric_var(self):
         """Calculate Parametric VaR (assumes normal distribution)"""
-        mu = self.returns.mean()
-        sigma = self.returns.std()
+        mu, sigma = self._mu, self._sigma
         
-        # Z-score for confidence level
-        z_score = stats.norm.ppf(self.alpha)
-        
-        var = -(mu + sigma * z_score)
+        var = -(mu + sigma * self._z)
         return var
     
     def parametric_cvar(self):
         """Calculate Parametric CVaR"""
-        mu = self.returns.mean()
-        sigma = self.returns.std()
-        
-        z_score = stats.norm.ppf(self.alpha)
+        mu, sigma = self._mu, self._sigma
         
         # CVaR formula for normal distribution
-        cvar = -(mu - sigma * stats.norm.pdf(z_score) / self.alpha)
+        cvar = -(mu - sigma * self._phi_z / self.alpha)
         return cvar
     def monte_carlo_var(self, n_simulations=10000):
         """Calculate Monte Carlo VaR"""
-        mu = self.returns.mean()
-        sigma = self.returns.std()
-        
-        # Simulate returns
-        simulated_returns = np.random.normal(mu, sigma, n_simulations)
-        
-        var = np.percentile(simulated_returns, self.alpha * 100)
-        return -var
+        var, _ = self.monte_carlo_var_cvar(n_simulations)
+        return var
     
     def monte_carlo_cvar(self, n_simulations=10000):
         """Calculate Monte Carlo CVaR"""
-        mu = self.returns.mean()
-        sigma = self.returns.std()
-        
-        # Simulate returns
-        simulated_returns = np.random.normal(mu, sigma, n_simulations)
+        _, cvar = self.monte_carlo_var_cvar(n_simulations)
+        return cvar
+    
+    def monte_carlo_var_cvar(self, n_simulations=10000):
+        """Calculate Monte Carlo VaR and CVaR from a single simulation"""
+        return _mc_var_cvar(self._rng, self._mu, self._sigma, n_simulations, self.alpha)
+    
+    def monte_carlo_sorted(self, n_simulations=10000):
+        """
+        Simulate returns and sort them once
         
-        var = np.percentile(simulated_returns, self.alpha * 100)
-        cvar = simulated_returns[simulated_returns <= var].mean()
-        return -cvar
+        Any confidence level's VaR is then an index lookup (see var_from_sorted),
+        so a single draw can be shared across confidence levels.
+        """
+        simulated_returns = _simulate_normal(self._rng, self._mu, self._sigma, n_simulations)
+        simulated_returns.sort()
+        return simulated_returns
     
     def get_all_metrics(self, portfolio_value=1000000, n_simulations=10000):
         """Calculate all VaR and CVaR metrics"""
+        mc_var, mc_cvar = self.monte_carlo_var_cvar(n_simulations)
+        
         metrics = {
             'Historical VaR': self.historical_var(),
             'Historical CVaR': self.historical_cvar(),
             'Parametric VaR': self.parametric_var(),
             'Parametric CVaR': self.parametric_cvar(),
-            'Monte Carlo VaR': self.monte_carlo_var(n_simulations),
-            'Monte Carlo CVaR': self.monte_carlo_cvar(n_simulations)
+            'Monte Carlo VaR': mc_var,
+            'Monte Carlo CVaR': mc_cvar
         }
         
         # Convert to dollar amounts
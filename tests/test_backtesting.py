@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.risk_metrics import RiskCalculator, tail_index
+import src.backtesting as backtesting
+from src.backtesting import FixedWindowQuantile, VaRBacktester
+
+def make_returns(n=400, seed=0):
+    """Deterministic returns rounded to basis points so the windows contain ties"""
+    rng = np.random.default_rng(seed)
+    values = np.round(rng.standard_normal(n) * 0.01, 4)
+    assert len(np.unique(values)) < n, "fixture should contain tied returns"
+    return pd.Series(values, index=pd.date_range('2020-01-01', periods=n))
+
+def expected_rolling_var(returns, window, confidence_level):
+    """Reference: a fresh RiskCalculator over each preceding window"""
+    return np.array([
+        RiskCalculator(returns.iloc[i - window:i], confidence_level).historical_var()
+        for i in range(window, len(returns))
+    ])
+
+def test_tail_index_ignores_float_error_in_alpha():
+    assert tail_index(1 - 0.90, 10000) == 1000
+    assert tail_index(1 - 0.90, 750) == 75
+    assert tail_index(1 - 0.99, 10000) == 100
+    assert tail_index(1.0, 10) == 9
+
+def test_fixed_window_quantile_matches_risk_calculator():
+    returns = make_returns()
+    for window, confidence_level in [(20, 0.95), (60, 0.99), (61, 0.90)]:
+        quantile = FixedWindowQuantile(window, 1 - confidence_level)
+        values = returns.tolist()
+        for x in values[:window]:
+            quantile.push(x)
+
+        streamed = []
+        for x in values[window:]:
+            streamed.append(-quantile.value())
+            quantile.push(x)
+
+        np.testing.assert_array_equal(
+            streamed, expected_rolling_var(returns, window, confidence_level)
+        )
+
+def test_rolling_historical_var_matches_risk_calculator():
+    returns = make_returns()
+    for window, confidence_level in [(20, 0.95), (60, 0.99), (61, 0.90)]:
+        backtester = VaRBacktester(returns, 0.0, confidence_level)
+        var_estimates, actual_returns = backtester.rolling_var_backtest(window=window)
+
+        np.testing.assert_array_equal(
+            var_estimates.to_numpy(),
+            expected_rolling_var(returns, window, confidence_level)
+        )
+        assert var_estimates.index.equals(returns.index[window:])
+        assert actual_returns.equals(returns.iloc[window:])
+
+def test_rolling_parametric_var_matches_risk_calculator():
+    returns = make_returns()
+    for window, confidence_level in [(2, 0.95), (20, 0.95), (60, 0.99)]:
+        backtester = VaRBacktester(returns, 0.0, confidence_level)
+        var_estimates, _ = backtester.rolling_var_backtest(window=window, method='parametric')
+
+        expected = [
+            RiskCalculator(returns.iloc[i - window:i], confidence_level).parametric_var()
+            for i in range(window, len(returns))
+        ]
+        np.testing.assert_allclose(var_estimates.to_numpy(), expected, rtol=1e-10, atol=1e-12)
+
+def test_rolling_monte_carlo_var_is_seeded():
+    returns = make_returns()
+    backtester = VaRBacktester(returns, 0.0)
+
+    first, _ = backtester.rolling_var_backtest(60, 'monte_carlo', n_simulations=2000, seed=7)
+    second, _ = backtester.rolling_var_backtest(60, 'monte_carlo', n_simulations=2000, seed=7)
+    other, _ = backtester.rolling_var_backtest(60, 'monte_carlo', n_simulations=2000, seed=8)
+
+    assert first.equals(second)
+    assert not first.equals(other)
+    assert first.index.equals(returns.index[60:])
+
+def test_chunked_monte_carlo_var_is_deterministic_and_near_parametric(monkeypatch):
+    returns = make_returns()
+    n_simulations = 20000
+    # Room for 7 rows per block, so the 340 windows span many blocks
+    monkeypatch.setattr(backtesting, 'MC_CHUNK_BYTES', 7 * 4 * n_simulations)
+    backtester = VaRBacktester(returns, 0.0)
+
+    first, _ = backtester.rolling_var_backtest(60, 'monte_carlo', n_simulations, seed=3)
+    second, _ = backtester.rolling_var_backtest(60, 'monte_carlo', n_simulations, seed=3)
+    parametric, _ = backtester.rolling_var_backtest(60, 'parametric')
+
+    assert first.equals(second)
+    np.testing.assert_allclose(first.to_numpy(), parametric.to_numpy(), rtol=0.05)
+
+def test_nan_returns_are_rejected():
+    returns = make_returns(n=300)
+    returns.iloc[150] = np.nan
+    backtester = VaRBacktester(returns, 0.0)
+    for method in ('historical', 'parametric', 'monte_carlo'):
+        with pytest.raises(ValueError, match="NaN"):
+            backtester.rolling_var_backtest(window=20, method=method, n_simulations=100)
+
+    quantile = FixedWindowQuantile(5, 0.05)
+    with pytest.raises(ValueError, match="NaN"):
+        quantile.push(float('nan'))
+
+def test_rolling_window_not_shorter_than_history_is_empty():
+    returns = make_returns(n=50)
+    backtester = VaRBacktester(returns, 0.0)
+    for window in (50, 80):
+        for method in ('historical', 'parametric', 'monte_carlo'):
+            var_estimates, actual_returns = backtester.rolling_var_backtest(
+                window=window, method=method, n_simulations=100
+            )
+            assert var_estimates.empty
+            assert actual_returns.empty
@@ -0,0 +1,15 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.risk_metrics import RiskCalculator, var_from_sorted
+
+@pytest.mark.parametrize('confidence_level', [0.90, 0.93, 0.95, 0.99])
+def test_seeded_monte_carlo_var_matches_sorted_draw(confidence_level):
+    # The app's metric cards and confidence-level chart rely on this agreement
+    returns = pd.Series(np.random.default_rng(0).standard_normal(750) * 0.01)
+    metrics, _ = RiskCalculator(returns, confidence_level, seed=42).get_all_metrics(
+        n_simulations=10000
+    )
+    sim_sorted = RiskCalculator(returns, seed=42).monte_carlo_sorted(10000)
+
+    assert metrics['Monte Carlo VaR'] == var_from_sorted(sim_sorted, [confidence_level])[0]